@@ -95,12 +95,9 @@ export class AiInput extends LitElement {
         const audioBlob = new Blob(this.audioChunks, {
           type: this.mediaRecorder?.mimeType || "audio/webm",
         });
-        const reader = new FileReader();
-        reader.readAsDataURL(audioBlob);
-        reader.onloadend = () => {
-          const base64data = reader.result as string;
+        audioBlob.arrayBuffer().then((audioBuffer) => {
           window.electronAPI.req.quartz
-            .transcribeAudio(base64data)
+            .transcribeAudio(new Uint8Array(audioBuffer))
             .then((transcription) => {
               this.textContent = transcription || "";
               this.isRecording = false;
@@ -113,7 +110,7 @@ export class AiInput extends LitElement {
               stream.getTracks().forEach((track) => track.stop());
               this.mediaRecorder = null;
             });
-        };
+        });
       };
 
       this.mediaRecorder.start();
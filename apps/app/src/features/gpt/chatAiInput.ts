@@ -121,12 +121,9 @@ export class ChatAiInput extends LitElement {
         const audioBlob = new Blob(this.audioChunks, {
           type: this.mediaRecorder?.mimeType || "audio/webm",
         });
-        const reader = new FileReader();
-        reader.readAsDataURL(audioBlob);
-        reader.onloadend = () => {
-          const base64data = reader.result as string;
+        audioBlob.arrayBuffer().then((audioBuffer) => {
           window.electronAPI.req.quartz
-            .transcribeAudio(base64data)
+            .transcribeAudio(new Uint8Array(audioBuffer))
             .then((transcription) => {
               this.textContent = transcription || "";
               this.isRecording = false;
@@ -139,7 +136,7 @@ export class ChatAiInput extends LitElement {
               stream.getTracks().forEach((track) => track.stop());
               this.mediaRecorder = null;
             });
-        };
+        });
       };
 
       this.mediaRecorder.start();
@@ -24,8 +24,9 @@ export const ipcQuartz = {
       // console.log(audioData);
       console.log("HI HI HI HIHI ")
 
-      const response = await axios.post(`http://0.0.0.0:8001/api/transcribe`, {
-        audioData
+      // audioData is the recorded file's bytes, posted as-is (no base64 encoding)
+      const response = await axios.post(`http://0.0.0.0:8001/api/transcribe_raw`, Buffer.from(audioData), {
+        headers: { "Content-Type": "application/octet-stream" }
       });
       console.log(response);
       return response.data.data;
@@ -7,6 +7,7 @@ import torch.nn.functional as F
 import numpy as np
 
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from PIL import Image
 
 from models.image import get_super_resolution, image_classification
@@ -156,13 +157,15 @@ async def api_image_super_resolution(request: ImageRequest):
         # Convert PIL image to numpy array for patch processing
         image_array = np.array(pil_image)
         
-        # Apply super resolution using patch-based processing for large images
+        # Apply super resolution using patch-based processing for large images.
+        # Inference runs in the threadpool so concurrent requests share the ONNX session
+        # without blocking the event loop.
         if image_array.shape[0] > 512 or image_array.shape[1] > 512:
             # Use patch-based processing for large images
-            enhanced_array = process_image_with_patches(image_array, patch_size=256, overlap=32)
+            enhanced_array = await run_in_threadpool(process_image_with_patches, image_array, patch_size=256, overlap=32)
         else:
             # Apply super resolution directly for smaller images
-            enhanced_array = get_super_resolution(pil_image)
+            enhanced_array = await run_in_threadpool(get_super_resolution, pil_image)
 
         # Generate unique filename and save processed image
         unique_filename = generate_filename_from_path(request.image_path, "sr")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Quantize the Real-ESRGAN ONNX model to int8 for the QNN HTP (NPU) backend.
+
+Uses ONNX Runtime static quantization in QDQ format, which is the format the
+QNN execution provider expects. Model inputs and outputs stay float32, so the
+super resolution post-processing in `models/image.py` is unchanged.
+
+Example:
+    python models/quantize_esrgan.py -m models/npu/esrgan.onnx -c assets/calibration
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import onnxruntime
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    QuantFormat,
+    QuantType,
+    quantize_static,
+)
+from PIL import Image
+from rich.console import Console
+
+console = Console()
+
+CALIBRATION_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+
+class ESRGANCalibrationDataReader(CalibrationDataReader):
+    """Feeds calibration images to the quantizer, resized to the model's static input shape."""
+
+    def __init__(self, model_path: str, calibration_dir: str, max_samples: int = 64):
+        session = onnxruntime.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        _, _, self.height, self.width = model_input.shape
+
+        self.image_paths: List[Path] = sorted(
+            path for path in Path(calibration_dir).iterdir()
+            if path.suffix.lower() in CALIBRATION_EXTENSIONS
+        )[:max_samples]
+        if not self.image_paths:
+            raise FileNotFoundError(f"No calibration images found in: {calibration_dir}")
+        self._iterator = iter(self.image_paths)
+
+    def _prepare(self, image_path: Path) -> np.ndarray:
+        """Load an image as a (1, 3, H, W) float32 tensor in [0, 1]."""
+        img = Image.open(image_path).convert('RGB').resize((self.width, self.height))
+        img_array = np.asarray(img, dtype=np.float32) / 255.0
+        return img_array.transpose(2, 0, 1)[np.newaxis]
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        image_path = next(self._iterator, None)
+        if image_path is None:
+            return None
+        return {self.input_name: self._prepare(image_path)}
+
+    def rewind(self) -> None:
+        self._iterator = iter(self.image_paths)
+
+
+def quantize_esrgan(model_path: str, calibration_dir: str, output_path: Optional[str] = None,
+                    max_samples: int = 64) -> str:
+    """
+    Quantize an fp32 ESRGAN ONNX model to int8 (QDQ, uint8 activations, int8 weights).
+
+    Args:
+        model_path: Path to the fp32 ESRGAN ONNX model
+        calibration_dir: Directory of representative images for calibration
+        output_path: Output path (default: `<model>_int8.onnx` next to the input model)
+        max_samples: Maximum number of calibration images to use
+
+    Returns:
+        Path to the quantized model
+    """
+    if output_path is None:
+        output_path = str(Path(model_path).with_name(f"{Path(model_path).stem}_int8.onnx"))
+
+    data_reader = ESRGANCalibrationDataReader(model_path, calibration_dir, max_samples)
+    console.print(f"[cyan]Calibrating with {len(data_reader.image_paths)} images...[/cyan]")
+
+    quantize_static(
+        model_input=model_path,
+        model_output=output_path,
+        calibration_data_reader=data_reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    return output_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Quantize the ESRGAN ONNX model to int8 for the NPU.")
+    parser.add_argument("-m", "--model", type=str, required=True, help="Path to the fp32 ESRGAN ONNX model")
+    parser.add_argument("-c", "--calibration-dir", type=str, required=True, help="Directory of calibration images")
+    parser.add_argument("-o", "--output", type=str, help="Output path (default: <model>_int8.onnx)")
+    parser.add_argument("--max-samples", type=int, default=64, help="Maximum calibration images (default: 64)")
+    args = parser.parse_args()
+
+    try:
+        output_path = quantize_esrgan(args.model, args.calibration_dir, args.output, args.max_samples)
+        console.print(f"[bold green]Quantized model saved to '{output_path}'[/bold green]")
+    except Exception as e:
+        console.print(f"[bold red]Quantization failed: {e}[/bold red]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
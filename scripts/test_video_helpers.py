@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Tests for the FFmpeg filter path escaping used by stabilize_video_ffmpeg
+"""
+
+import os
+import sys
+
+# Add the scripts directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.video_helpers import _escape_filter_path
+
+
+def test_escape_filter_path_windows_drive():
+    """The drive colon is escaped for both the filtergraph and the option parser"""
+    assert _escape_filter_path("C:\\a\\b.trf") == "C\\\\:/a/b.trf"
+
+
+def test_escape_filter_path_posix():
+    """Plain POSIX paths pass through unchanged"""
+    assert _escape_filter_path("/dev/shm/transforms_0.trf") == "/dev/shm/transforms_0.trf"
+
+
+def test_escape_filter_path_graph_separators():
+    """Characters that split the filtergraph are escaped"""
+    assert _escape_filter_path("/tmp/a,b;c[d]") == "/tmp/a\\,b\\;c\\[d\\]"
+
+
+if __name__ == "__main__":
+    test_escape_filter_path_windows_drive()
+    test_escape_filter_path_posix()
+    test_escape_filter_path_graph_separators()
+    print("✅ All tests passed")
@@ -10,7 +10,7 @@ from PIL import Image
 import numpy as np
 import cv2
 
-from models.image import get_depth_map, remove_background
+from models.image import get_depth_map, remove_background, remove_background_batch
 
 
 # Load configuration from config.yaml
@@ -170,6 +170,35 @@ def process_image_upload(file: UploadFile) -> Image.Image:
         raise HTTPException(status_code=400, detail=f"Invalid image file: {str(e)}")
 
 
+def fast_gaussian_blur(image_array: np.ndarray, blur_kernel: int) -> np.ndarray:
+    """
+    Approximate cv2.GaussianBlur with a (2 * blur_kernel + 1) kernel at a fraction of the cost.
+    
+    A large Gaussian has no high frequencies left to preserve, so the image is
+    area-downscaled, blurred with the proportionally smaller sigma and upscaled
+    again. For the portrait kernel this touches ~1/16 of the pixels with a ~4x
+    shorter kernel.
+    
+    Args:
+        image_array: Image as uint8 numpy array
+        blur_kernel: Blur radius in pixels, as in the portrait effect config
+        
+    Returns:
+        Blurred image array with the same shape and dtype
+    """
+    ksize = blur_kernel * 2 + 1
+    # Same sigma OpenCV derives from ksize when sigma=0 is passed
+    sigma = 0.3 * ((ksize - 1) * 0.5 - 1) + 0.8
+    factor = blur_kernel // 8
+    height, width = image_array.shape[:2]
+    if factor < 2 or min(height, width) < factor * 16:
+        return cv2.GaussianBlur(image_array, (ksize, ksize), 0)
+    
+    small = cv2.resize(image_array, (width // factor, height // factor), interpolation=cv2.INTER_AREA)
+    small = cv2.GaussianBlur(small, (0, 0), sigma / factor)
+    return cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
 def apply_depth_based_blur(image_array: np.ndarray, depth_map: np.ndarray, 
                           depth_threshold: float = None, blur_kernel: int = None) -> np.ndarray:
     """
@@ -193,11 +222,11 @@ def apply_depth_based_blur(image_array: np.ndarray, depth_map: np.ndarray,
     blur_mask = depth_map < depth_threshold
     
     # Apply Gaussian blur to entire image
-    blurred_image = cv2.GaussianBlur(image_array, (blur_kernel * 2 + 1, blur_kernel * 2 + 1), 0)
+    blurred_image = fast_gaussian_blur(image_array, blur_kernel)
     
-    # Blend original and blurred based on mask
-    result = np.where(blur_mask[..., np.newaxis], blurred_image, image_array)
-    return result.astype(np.uint8)
+    # Keep the original pixels outside the mask, writing into the blurred copy in place
+    np.copyto(blurred_image, image_array, where=~blur_mask[..., np.newaxis])
+    return blurred_image
 
 
 def create_portrait_effect(pil_image: Image.Image) -> np.ndarray:
@@ -221,24 +250,20 @@ def create_portrait_effect(pil_image: Image.Image) -> np.ndarray:
         blur_kernel = CONFIG["image"]["portrait_effect"]["blur_kernel"]
         depth_threshold = CONFIG["image"]["portrait_effect"]["depth_threshold"]
 
-        def _blur_image(img_arr, kernel):
-            """Helper function to run Gaussian blur."""
-            return cv2.GaussianBlur(img_arr, (kernel * 2 + 1, kernel * 2 + 1), 0)
-
         with concurrent.futures.ThreadPoolExecutor() as executor:
             # Submit depth map and blur operations to run in parallel
             future_depth_map = executor.submit(get_depth_map, pil_image)
-            future_blurred_image = executor.submit(_blur_image, image_array, blur_kernel)
+            future_blurred_image = executor.submit(fast_gaussian_blur, image_array, blur_kernel)
 
             # Retrieve results once both tasks are complete
             depth_map = future_depth_map.result()
             blurred_image = future_blurred_image.result()
 
-        # Combine the results
+        # Combine the results, keeping the original pixels outside the blur mask
         blur_mask = depth_map < depth_threshold
-        portrait_result = np.where(blur_mask[..., np.newaxis], blurred_image, image_array)
+        np.copyto(blurred_image, image_array, where=~blur_mask[..., np.newaxis])
         
-        return portrait_result.astype(np.uint8)
+        return blurred_image
 
     except Exception as e:
         raise RuntimeError(f"Portrait effect processing failed: {str(e)}")
@@ -272,6 +297,22 @@ def calculate_color_statistics(lab_image: np.ndarray) -> tuple:
     return mean, std
 
 
+def compute_color_stats(reference_image: Image.Image) -> tuple:
+    """
+    Compute the LAB color statistics of a reference image for color transfer.
+    
+    Callers applying one reference to many frames compute this once and pass the
+    result to perform_color_transfer_batch.
+    
+    Args:
+        reference_image: PIL Image to use as color reference
+        
+    Returns:
+        Tuple of (mean, std) arrays for LAB channels
+    """
+    return calculate_color_statistics(convert_to_lab_color_space(np.array(reference_image)))
+
+
 def apply_color_transfer_statistics(target_lab: np.ndarray, target_stats: tuple, 
                                   reference_stats: tuple) -> np.ndarray:
     """
@@ -345,6 +386,47 @@ def perform_color_transfer(reference_image: Image.Image, target_image: Image.Ima
         raise RuntimeError(f"Color transfer processing failed: {str(e)}")
 
 
+def perform_color_transfer_batch(reference_stats: tuple, frames) -> list:
+    """
+    Transfer precomputed reference color statistics to a batch of same-sized frames.
+    
+    The frames are stacked so the LAB conversions run as one OpenCV call per batch
+    and the statistics and transfer arithmetic as broadcast NumPy operations over
+    the whole (N, H, W, 3) block.
+    
+    Args:
+        reference_stats: Reference (mean, std) LAB statistics from compute_color_stats
+        frames: RGB frames as numpy arrays or PIL Images, all of the same size, or a
+            stacked (N, H, W, 3) array
+        
+    Returns:
+        List of color-transferred frames as numpy arrays
+        
+    Raises:
+        RuntimeError: If color transfer processing fails
+    """
+    try:
+        ref_mean, ref_std = reference_stats
+        
+        stacked = frames if isinstance(frames, np.ndarray) else np.stack([np.asarray(frame) for frame in frames])
+        n, h, w, _ = stacked.shape
+        # cvtColor works on 2D images, so convert the stack as one tall (N*H, W) image
+        target_lab = convert_to_lab_color_space(stacked.reshape(n * h, w, 3)).reshape(n, h, w, 3)
+        
+        target_mean = target_lab.mean(axis=(1, 2), keepdims=True)
+        target_std = target_lab.std(axis=(1, 2), keepdims=True)
+        target_lab -= target_mean
+        target_lab *= ref_std / target_std
+        target_lab += ref_mean
+        np.clip(target_lab, 0, 255, out=target_lab)
+        
+        result_rgb = convert_lab_to_rgb(target_lab.reshape(n * h, w, 3)).reshape(n, h, w, 3)
+        return list(result_rgb)
+        
+    except Exception as e:
+        raise RuntimeError(f"Color transfer processing failed: {str(e)}")
+
+
 def save_processed_image_png(image_array: np.ndarray, filename: str) -> str:
     """
     Save processed RGBA image array to assets/public directory as PNG.
@@ -397,3 +479,24 @@ def perform_background_removal(pil_image: Image.Image) -> np.ndarray:
         
     except Exception as e:
         raise RuntimeError(f"Background removal processing failed: {str(e)}")
+
+
+def perform_background_removal_batch(frames, batch_size: int = 16) -> list:
+    """
+    Remove background from same-sized frames, batch_size frames per RMBG-1.4 forward pass.
+    
+    Args:
+        frames: Input frames as RGB numpy arrays or PIL Images, or a stacked (N, H, W, 3) array
+        batch_size: Number of frames per forward pass
+        
+    Returns:
+        List of RGBA image arrays with transparent background
+        
+    Raises:
+        RuntimeError: If background removal processing fails
+    """
+    try:
+        return remove_background_batch(frames, batch_size=batch_size)
+        
+    except Exception as e:
+        raise RuntimeError(f"Background removal processing failed: {str(e)}")
@@ -1,17 +1,25 @@
+import asyncio
 import logging
 import os
+import queue
+import stat
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Tuple, TypeVar
+import numpy as np
 from fastapi import HTTPException, APIRouter
 # from main import router
 from data_models import VideoStabilizationRequest, VideoStabilizationResponse, VideoRequest, VideoResponse, ColorGradingRequest
 from utils.video_helpers import (
-    generate_unique_filename, extract_video_clip, convert_to_mov,
+    generate_unique_filename,
     stabilize_video, ensure_directories_exist, get_absolute_path, cleanup_temp_files,
-    convert_video_to_24fps
+    cached_24fps_video, video_encoder_args, video_decoder_args, first_stream, probe_video,
+    count_video_packets, MOV_AUDIO_CODECS
 )
 from utils.image_helpers import (
-    validate_image_path, load_image_from_path, perform_background_removal, 
-    save_processed_image_png, perform_color_transfer, save_processed_image,
-    create_portrait_effect
+    validate_image_path, load_image_from_path, perform_background_removal_batch,
+    compute_color_stats, perform_color_transfer_batch, create_portrait_effect
 )
 import tempfile
 import shutil
@@ -20,91 +28,405 @@ from pathlib import Path
 
 router = APIRouter()
 
+T = TypeVar("T")
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Source videos are resampled to 24 fps like the other video endpoints, then sampled
+# at OUTPUT_FPS for per-frame processing and re-encoding
+SOURCE_FPS = 24
+OUTPUT_FPS = 30
+
+# Worker counts for per-frame processing. CPU-only ops scale with cores; GPU-backed
+# models share one loaded instance, so a couple of threads are enough to overlap
+# host-side pre/post-processing and copies of one frame or batch with inference
+# on the next (torch releases the GIL while kernels run).
+CPU_FRAME_WORKERS = os.cpu_count() or 1
+GPU_FRAME_WORKERS = 2
+
+# Frames per RMBG-1.4 forward pass for video background removal
+RMBG_BATCH_SIZE = 16
+
+# RMBG-1.4 predicts its mask at 1024x1024, so decoding background-removal input above
+# 1080p only adds bytes to copy and resize; taller videos are downscaled by FFmpeg
+RMBG_MAX_HEIGHT = 1080
+
+# Independent time ranges of one video processed concurrently, each with its own
+# decoder and encoder. Capped at 4 to stay within consumer NVENC session limits;
+# GPU-backed endpoints use two groups so one group's decode/encode overlaps the
+# other's inference. Videos shorter than two MIN_GROUP_SECONDS ranges aren't split.
+CPU_FRAME_GROUPS = max(1, min(4, CPU_FRAME_WORKERS // 2))
+GPU_FRAME_GROUPS = 2
+MIN_GROUP_SECONDS = 5.0
+
+# A group's decoder seeks this far before its first frame, so the fps filters see the
+# same source frames around the boundary as a decode from the start of the file
+GROUP_SEEK_MARGIN_SECONDS = 1.0
+
+# Parent of the per-request working directories holding the encoded group segments
+TEMP_ROOT = "./tmp"
+
+# Frames per vectorized color transfer call; each worker holds a couple of batches,
+# so the worker count is scaled down to keep the frames in flight near one per core
+COLOR_TRANSFER_BATCH_SIZE = 8
+COLOR_TRANSFER_WORKERS = max(1, CPU_FRAME_WORKERS // (COLOR_TRANSFER_BATCH_SIZE * CPU_FRAME_GROUPS))
+
+# Bounded hand-off queues between the decode, process and encode stages, so each
+# stage runs in its own thread; decoded batches are counted as one item each
+DECODE_QUEUE_BATCHES = 2
+ENCODE_QUEUE_FRAMES = 8
+
+# Static parts of the FFmpeg command lines, built once at import. _QUIET_ARGS limits
+# FFmpeg's stderr to actual errors, so nothing is buffered or discarded on success
+_QUIET_ARGS = ("-hide_banner", "-nostats", "-loglevel", "error")
+_DECODE_FILTERS = f"fps={SOURCE_FPS},fps={OUTPUT_FPS}"
+_DECODE_OUTPUT_ARGS = ("-f", "rawvideo", "-pix_fmt", "rgb24", "-")
+_ENCODE_INPUT_ARGS = ("-f", "rawvideo", "-r", str(OUTPUT_FPS))
+_ENCODE_AUDIO_ARGS = ("-map", "0:v:0", "-map", "1:a:0", "-shortest")
+_CONCAT_INPUT_ARGS = ("-f", "concat", "-safe", "0")
+_DENOISE_EXTRACT_ARGS = ("-vn", "-acodec", "pcm_s16le", "-ar", "44100", "-ac", "2")
+_DENOISE_MUX_ARGS = ("-c:v", "copy", "-map", "0:v:0", "-map", "1:a:0", "-shortest")
+
 def validate_video_path(video_path: str) -> None:
     """Validate that the video path exists and is a valid file."""
-    if not os.path.exists(video_path):
+    # One stat answers both questions
+    try:
+        mode = os.stat(video_path).st_mode
+    except FileNotFoundError:
         raise HTTPException(status_code=400, detail=f"Video file not found: {video_path}")
-    if not os.path.isfile(video_path):
+    if not stat.S_ISREG(mode):
         raise HTTPException(status_code=400, detail=f"Path is not a file: {video_path}")
 
-def create_temp_directory() -> str:
-    """Create a temporary directory and return its path."""
-    return tempfile.mkdtemp()
+def get_video_dimensions(video_path: str) -> Tuple[int, int]:
+    """
+    Read the displayed width and height of the first video stream from the cached ffprobe metadata.
+    
+    FFmpeg applies rotation metadata when decoding, so a stream rotated by 90 or 270
+    degrees yields frames with width and height swapped relative to the coded size.
+    """
+    stream = first_stream(video_path, "video")
+    if stream is None:
+        raise ValueError(f"No video stream found in {video_path}")
+    width, height = int(stream["width"]), int(stream["height"])
+    
+    rotation = float(stream.get("tags", {}).get("rotate", 0))
+    for side_data in stream.get("side_data_list", []):
+        rotation = float(side_data.get("rotation", rotation))
+    if round(rotation) % 180:
+        width, height = height, width
+    return width, height
+
+def fit_to_height(width: int, height: int, max_height: int) -> Tuple[int, int]:
+    """Scale frame dimensions down to at most max_height, keeping the aspect ratio and even sizes."""
+    if height <= max_height:
+        return width, height
+    scaled_width = max(2, round(width * max_height / height / 2) * 2)
+    return scaled_width, max_height - max_height % 2
 
-def extract_frames_and_audio(video_path: str, frames_dir: str, audio_path: str) -> bool:
-    """Extract frames and audio from video using FFmpeg."""
+def iter_frame_batches(video_path: str, width: int, height: int, batch_size: int,
+                       first_frame: int = 0, end_frame: Optional[int] = None) -> Iterator[np.ndarray]:
+    """
+    Decode video frames through a single FFmpeg pipe, resampled to SOURCE_FPS and then OUTPUT_FPS.
+    
+    Each batch is read straight from the pipe into one freshly allocated array, so
+    frames need no per-frame bytes object or later np.stack copy before batched
+    processing (e.g. a single host-to-device transfer per batch).
+    
+    Args:
+        video_path: Path to the input video
+        width: Frame width in pixels; frames are scaled to this size if the video differs
+        height: Frame height in pixels
+        batch_size: Maximum number of frames per batch
+        first_frame: Index of the first OUTPUT_FPS frame to decode
+        end_frame: Index one past the last frame to decode, or None to decode to the end
+    Yields:
+        (N, H, W, 3) RGB uint8 arrays with N <= batch_size, in order
+    """
+    frame_nbytes = width * height * 3
+    range_args, trim_filter = (), ""
+    if first_frame or end_frame is not None:
+        # Timestamps are kept relative to the start of the file, so after the fps filters
+        # frame i has pts i in the 1/OUTPUT_FPS time base wherever decoding started, and
+        # trim cuts exactly [first_frame, end_frame) out of the same frame grid
+        seek = max(0.0, first_frame / OUTPUT_FPS - GROUP_SEEK_MARGIN_SECONDS)
+        range_args = ("-copyts", "-start_at_zero", *(("-ss", str(seek)) if seek else ()))
+        trim_filter = f",trim=start_pts={first_frame}" + (f":end_pts={end_frame}" if end_frame is not None else "")
+    # The explicit scale is a no-op at the native size and guarantees the frame size read below
+    cmd = [
+        "ffmpeg", *_QUIET_ARGS, *video_decoder_args(), *range_args, "-i", video_path,
+        "-vf", f"{_DECODE_FILTERS}{trim_filter},scale={width}:{height}", *_DECODE_OUTPUT_ARGS
+    ]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               bufsize=frame_nbytes * 10)
     try:
-        # Extract frames
-        frames_cmd = [
-            "ffmpeg", "-i", video_path, "-vf", "fps=30", 
-            os.path.join(frames_dir, "frame_%06d.png"), "-y"
-        ]
-        frames_result = subprocess.run(frames_cmd, capture_output=True, text=True)
-        
-        if frames_result.returncode != 0:
-            logger.error(f"Failed to extract frames: {frames_result.stderr}")
-            return False
-        
-        # Extract audio
-        audio_cmd = [
-            "ffmpeg", "-i", video_path, "-vn", "-acodec", "aac", audio_path, "-y"
-        ]
-        audio_result = subprocess.run(audio_cmd, capture_output=True, text=True)
-        
-        if audio_result.returncode != 0:
-            logger.error(f"Failed to extract audio: {audio_result.stderr}")
-            return False
-            
-        return True
-    except Exception as e:
-        logger.error(f"Error extracting frames and audio: {str(e)}")
+        while True:
+            batch = np.empty((batch_size, height, width, 3), dtype=np.uint8)
+            n_frames = process.stdout.readinto(memoryview(batch).cast("B")) // frame_nbytes
+            if n_frames:
+                yield batch[:n_frames]
+            if n_frames < batch_size:
+                break
+    finally:
+        # Stop the decoder if the consumer bailed out before EOF
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+def iter_frames(video_path: str, width: int, height: int,
+                first_frame: int = 0, end_frame: Optional[int] = None) -> Iterator[np.ndarray]:
+    """Decode video frames one at a time; see iter_frame_batches."""
+    for batch in iter_frame_batches(video_path, width, height, 1, first_frame, end_frame):
+        yield batch[0]
+
+def prefetch(items: Iterable[T], maxsize: int) -> Iterator[T]:
+    """
+    Iterate items on a background thread, handing them over through a bounded queue.
+    
+    The producer runs at most maxsize items ahead, so a slow consumer applies
+    backpressure instead of buffering a whole video. Producer exceptions are re-raised
+    in the consumer, and closing the consumer early stops and closes the producer.
+    
+    Args:
+        items: Iterable to consume in the background (e.g. a frame generator)
+        maxsize: Maximum number of items waiting in the queue
+    Yields:
+        The items, in order
+    """
+    handoff = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    done = object()
+    
+    def _put(item) -> bool:
+        while not stop.is_set():
+            try:
+                handoff.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def _produce() -> None:
+        iterator = iter(items)
+        try:
+            for item in iterator:
+                if not _put((item, None)):
+                    break
+            else:
+                _put((done, None))
+        except BaseException as e:
+            _put((done, e))
+        finally:
+            # Generators must be closed on the thread that runs them (e.g. to stop a decoder)
+            if hasattr(iterator, "close"):
+                iterator.close()
+    
+    producer = threading.Thread(target=_produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = handoff.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+def map_frames_in_order(fn: Callable[[np.ndarray], np.ndarray], frames: Iterable[np.ndarray],
+                        max_workers: int) -> Iterator[np.ndarray]:
+    """
+    Apply a per-frame function on a thread pool, yielding results in frame order.
+    
+    Args:
+        fn: Function processing one frame
+        frames: Input frames, in order
+        max_workers: Number of worker threads
+    Yields:
+        Processed frames in the same order as the input
+    """
+    max_pending = max_workers * 2  # bounds the number of decoded frames held in memory
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for frame in frames:
+            pending.append(pool.submit(fn, frame))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def map_frame_batches(fn: Callable[[np.ndarray], Iterable[np.ndarray]], batches: Iterable[np.ndarray],
+                      max_workers: int = 1) -> Iterator[np.ndarray]:
+    """
+    Apply a batched per-frame function to a stream of frame batches.
+    
+    Args:
+        fn: Function processing an (N, H, W, C) batch into N result frames
+        batches: Input frame batches, in order
+        max_workers: Number of batches processed concurrently on a thread pool
+    Yields:
+        Processed frames in the same order as the input
+    """
+    # Reading the decoder's pipe happens on its own thread, overlapping the processing
+    batches = prefetch(batches, DECODE_QUEUE_BATCHES)
+    results = map_frames_in_order(fn, batches, max_workers) if max_workers > 1 else map(fn, batches)
+    for batch in results:
+        yield from batch
+
+def audio_mux_args(source_path: Optional[str]) -> Tuple[str, ...]:
+    """
+    Build the FFmpeg arguments adding the source video's audio as the second input.
+    
+    The audio stream is read straight from the source file and stream-copied when
+    MOV can hold its codec, so it is neither extracted to a temp file nor re-encoded.
+    Returns no arguments when there is no source or it has no audio stream.
+    """
+    audio_stream = first_stream(source_path, "audio") if source_path else None
+    if audio_stream is None:
+        return ()
+    audio_codec = "copy" if audio_stream.get("codec_name") in MOV_AUDIO_CODECS else "aac"
+    return ("-i", source_path, *_ENCODE_AUDIO_ARGS, "-c:a", audio_codec)
+
+def write_frames_to_video(frames: Iterable[np.ndarray], width: int, height: int, pix_fmt: str,
+                          source_path: Optional[str], output_path: str) -> bool:
+    """
+    Encode processed frames piped over stdin and mux in the source video's audio.
+    
+    Args:
+        frames: HxWxC uint8 frames matching pix_fmt
+        width: Frame width in pixels
+        height: Frame height in pixels
+        pix_fmt: Raw pixel format of the frames ("rgb24" or "rgba")
+        source_path: Original video whose audio track (if any) is muxed into the output,
+            or None for a video-only output
+        output_path: Path for the encoded video
+    Returns:
+        True if every frame was encoded successfully
+    """
+    cmd = [
+        "ffmpeg", *_QUIET_ARGS, *_ENCODE_INPUT_ARGS, "-pix_fmt", pix_fmt, "-s", f"{width}x{height}", "-i", "-",
+        *audio_mux_args(source_path), *video_encoder_args(), "-pix_fmt", "yuv420p", output_path, "-y"
+    ]
+    # FFmpeg's output goes to DEVNULL: nobody reads it while frames are written,
+    # so a PIPE would eventually fill and deadlock both processes
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    try:
+        # Frames are produced (decoded and processed) on a background thread while
+        # this one writes to the encoder, so the two stages overlap
+        for frame in prefetch(frames, ENCODE_QUEUE_FRAMES):
+            process.stdin.write(np.ascontiguousarray(frame).data)
+        process.stdin.close()
+    except BrokenPipeError:
+        logger.error("FFmpeg encoder exited before all frames were written")
+    except Exception:
+        process.kill()
+        process.wait()
+        raise
+    
+    if process.wait() != 0:
+        logger.error(f"Failed to encode frames: ffmpeg exited with code {process.returncode}")
         return False
+    return True
 
-def combine_frames_to_video(frames_dir: str, output_path: str) -> bool:
-    """Combine processed frames back into a video."""
+def encode_video_in_groups(video_path: str, process_range: Callable[[int, Optional[int]], Iterable[np.ndarray]],
+                           width: int, height: int, pix_fmt: str, output_path: str, groups: int) -> bool:
+    """
+    Process and encode a video as several concurrent frame ranges, then join them losslessly.
+    
+    Each range runs its own decode -> process -> encode pipeline into a video-only
+    segment; the segments are concatenated with stream copy while the source audio
+    is muxed in, so no frame is encoded twice. Ranges are split on OUTPUT_FPS frame
+    indices, and every segment's frame count is checked before joining, so no frame
+    is duplicated or dropped at a join.
+    
+    Args:
+        video_path: Path to the input video
+        process_range: Returns the processed frames for (first frame, end frame or None)
+        width: Frame width in pixels
+        height: Frame height in pixels
+        pix_fmt: Raw pixel format of the processed frames ("rgb24" or "rgba")
+        output_path: Path for the encoded video
+        groups: Maximum number of concurrent frame ranges
+    Returns:
+        True if every range was encoded and joined successfully
+    """
+    video_stream = first_stream(video_path, "video") or {}
+    duration = float(video_stream.get("duration") or probe_video(video_path)["format"].get("duration", 0))
+    groups = min(groups, int(duration // MIN_GROUP_SECONDS))
+    if groups <= 1:
+        return write_frames_to_video(process_range(0, None), width, height, pix_fmt, video_path, output_path)
+    
+    os.makedirs(TEMP_ROOT, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix="quartz_", dir=TEMP_ROOT)
     try:
+        frames_per_group = int(duration * OUTPUT_FPS) // groups
+        # The last range runs to the end so no trailing frames are lost to the estimate
+        ranges = [(index * frames_per_group, (index + 1) * frames_per_group if index < groups - 1 else None)
+                  for index in range(groups)]
+        segment_paths = [os.path.join(temp_dir, f"group_{index:02d}.mov") for index in range(groups)]
+        frame_counts = [0] * groups
+        
+        def _counted(index: int, frames: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+            for frame in frames:
+                frame_counts[index] += 1
+                yield frame
+        
+        def _encode_group(index: int) -> bool:
+            return write_frames_to_video(_counted(index, process_range(*ranges[index])), width, height,
+                                         pix_fmt, None, segment_paths[index])
+        
+        with ThreadPoolExecutor(max_workers=groups) as pool:
+            if not all(pool.map(_encode_group, range(groups))):
+                return False
+        
+        for index, (first_frame, end_frame) in enumerate(ranges):
+            if end_frame is not None and frame_counts[index] != end_frame - first_frame:
+                logger.error(f"Frame group {index} decoded {frame_counts[index]} frames, "
+                             f"expected {end_frame - first_frame}")
+                return False
+        encoded_frames = sum(count_video_packets(path) for path in segment_paths)
+        if encoded_frames != sum(frame_counts):
+            logger.error(f"Frame groups encoded {encoded_frames} frames, expected {sum(frame_counts)}")
+            return False
+        
+        list_path = os.path.join(temp_dir, "groups.txt")
+        with open(list_path, "w") as list_file:
+            list_file.writelines(f"file '{os.path.abspath(path)}'\n" for path in segment_paths)
         cmd = [
-            "ffmpeg", "-framerate", "30", "-i", os.path.join(frames_dir, "frame_%06d.png"),
-            "-c:v", "libx264", "-pix_fmt", "yuv420p", output_path, "-y"
+            "ffmpeg", *_QUIET_ARGS, *_CONCAT_INPUT_ARGS, "-i", list_path, *audio_mux_args(video_path),
+            "-c:v", "copy", output_path, "-y"
         ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
         if result.returncode != 0:
-            logger.error(f"Failed to combine frames: {result.stderr}")
+            logger.error(f"Failed to join frame groups: {result.stderr.decode(errors='replace')}")
             return False
-            
         return True
-    except Exception as e:
-        logger.error(f"Error combining frames: {str(e)}")
-        return False
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+async def run_ffmpeg_async(*args: str) -> None:
+    """
+    Run FFmpeg on a worker thread so the event loop keeps serving other requests.
+    
+    asyncio subprocesses aren't used: on Windows, uvicorn's --reload and multi-worker
+    modes run a selector event loop, which doesn't support them.
+    
+    Raises:
+        subprocess.CalledProcessError: If FFmpeg exits with a non-zero status
+    """
+    cmd = ["ffmpeg", *_QUIET_ARGS, *args]
+    await asyncio.to_thread(subprocess.run, cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
 
 def generate_video_filename(video_path: str, suffix: str) -> str:
     """Generate a filename for processed video."""
     base_name = os.path.splitext(os.path.basename(video_path))[0]
     return f"{base_name}_{suffix}_{generate_unique_filename('mov')}"
 
-def add_audio_to_video(video_path: str, audio_path: str, output_path: str) -> bool:
-    """Add audio track to video."""
-    try:
-        cmd = [
-            "ffmpeg", "-i", video_path, "-i", audio_path, "-c:v", "copy", 
-            "-c:a", "aac", "-map", "0:v:0", "-map", "1:a:0", output_path, "-y"
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            logger.error(f"Failed to add audio: {result.stderr}")
-            return False
-            
-        return True
-    except Exception as e:
-        logger.error(f"Error adding audio: {str(e)}")
-        return False
-
 @router.post("/api/video/video-stabilization", response_model=VideoStabilizationResponse)
 async def api_video_stabilization(request: VideoStabilizationRequest) -> VideoStabilizationResponse:
     """
@@ -117,8 +439,6 @@ async def api_video_stabilization(request: VideoStabilizationRequest) -> VideoSt
     Raises:
         HTTPException: If video processing fails at any step.
     """
-    temp_clip_path = None
-    temp_mov_path = None
     final_output_path = None
     fps_video_path = None
 
@@ -130,48 +450,26 @@ async def api_video_stabilization(request: VideoStabilizationRequest) -> VideoSt
         logger.info("📂 Ensuring directories exist...")
         ensure_directories_exist()
 
-        # Step 1: Convert video to 24 FPS
-        logger.info("🔄 Step 1/4: Converting video to 24 FPS...")
-        fps_video_name = generate_unique_filename("mp4")
-        fps_video_path = f"tmp/{fps_video_name}"
-        if not convert_video_to_24fps(request.video_path, fps_video_path):
+        # Step 1: Convert video to 24 FPS MOV
+        logger.info("🔄 Step 1/2: Converting video to 24 FPS...")
+        # The conversion is cached by content; this request gets its own link to it
+        fps_video_path = await asyncio.to_thread(cached_24fps_video, request.video_path)
+        if fps_video_path is None:
             logger.error("❌ Failed to convert video to 24 FPS")
             raise Exception("Failed to convert video to 24 FPS")
         logger.info("✅ Video conversion to 24 FPS completed successfully")
         
-        # Generate unique filenames for processing steps
-        temp_mov_name = generate_unique_filename("mov") 
         final_output_name = generate_unique_filename("mov")
-        
-        # Define file paths for processing pipeline
-        temp_mov_path = f"tmp/{temp_mov_name}"
         final_output_path = f"assets/public/{final_output_name}"
-        
-        logger.info(f"🔄 Generated processing pipeline:")
-        logger.info(f"   • Temp MOV: {temp_mov_path}")
         logger.info(f"   • Final output: {final_output_path}")
         
-        # Convert 24fps video to MOV format
-        logger.info("🔄 Step 2/4: Converting to MOV format...")
-        if not convert_to_mov(fps_video_path, temp_mov_path):
-            logger.error("❌ Failed to convert video format")
-            cleanup_temp_files(fps_video_path)
-            raise Exception("Failed to convert video format")
-        logger.info("✅ Video format conversion completed successfully")
-        
         # Apply video stabilization using VidStab
-        logger.info("🎯 Step 3/4: Applying video stabilization...")
-        if not stabilize_video(temp_mov_path, final_output_path):
+        logger.info("🎯 Step 2/2: Applying video stabilization...")
+        if not await asyncio.to_thread(stabilize_video, fps_video_path, final_output_path):
             logger.error("❌ Failed to stabilize video")
-            cleanup_temp_files(fps_video_path, temp_mov_path)
             raise Exception("Failed to stabilize video")
         logger.info("✅ Video stabilization completed successfully")
         
-        # Clean up temporary files after successful processing
-        logger.info("🧹 Step 4/4: Cleaning up temporary files...")
-        cleanup_temp_files(fps_video_path, temp_mov_path)
-        logger.info("✅ Temporary files cleaned up")
-        
         # Return response with download link and absolute path
         absolute_path = get_absolute_path(final_output_path)
         download_link = f"/api/assets/public/{final_output_name}"
@@ -190,8 +488,11 @@ async def api_video_stabilization(request: VideoStabilizationRequest) -> VideoSt
         # Clean up any remaining temporary files on unexpected error
         logger.error(f"💥 Unexpected error during video processing: {str(e)}")
         logger.info("🧹 Attempting cleanup of temporary files...")
-        cleanup_temp_files(fps_video_path, temp_mov_path, final_output_path)
+        cleanup_temp_files(final_output_path)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    finally:
+        if fps_video_path is not None:
+            cleanup_temp_files(fps_video_path)
 
 
 @router.post("/api/video/remove-bg")
@@ -211,68 +512,31 @@ async def api_video_background_removal(request: VideoRequest) -> VideoResponse:
     Raises:
         HTTPException: If processing fails
     """
-    temp_dir = None
-    fps_video_path = None
     try:
         # Validate video path
         validate_video_path(request.video_path)
         
-        # Step 1: Convert video to 24 FPS
-        logger.info("🔄 Step 1/5: Converting video to 24 FPS...")
-        fps_video_name = generate_unique_filename("mp4")
-        fps_video_path = os.path.join(tempfile.gettempdir(), fps_video_name)
-        if not convert_video_to_24fps(request.video_path, fps_video_path):
-            logger.error("❌ Failed to convert video to 24 FPS")
-            raise HTTPException(status_code=500, detail="Failed to convert video to 24 FPS")
-        logger.info("✅ Video conversion to 24 FPS completed successfully")
-
-        # Create temporary files
-        temp_dir = create_temp_directory()
-        temp_frames_dir = os.path.join(temp_dir, "frames")
-        temp_processed_dir = os.path.join(temp_dir, "processed")
-        os.makedirs(temp_frames_dir)
-        os.makedirs(temp_processed_dir)
-        
-        # Extract frames and audio
-        logger.info("🔄 Step 2/5: Extracting video frames and audio...")
-        audio_path = os.path.join(temp_dir, "audio.aac")
-        if not extract_frames_and_audio(fps_video_path, temp_frames_dir, audio_path):
-            logger.error("❌ Failed to extract frames and audio")
-            cleanup_temp_files(temp_dir, fps_video_path)
-            raise HTTPException(status_code=400, detail="Failed to extract video frames")
-            
-        # Process each frame
-        logger.info("🎯 Step 3/5: Processing frames...")
-        frame_files = sorted(os.listdir(temp_frames_dir))
-        for frame_file in frame_files:
-            frame_path = os.path.join(temp_frames_dir, frame_file)
-            output_path = os.path.join(temp_processed_dir, frame_file)
-            
-            # Load frame and remove background
-            frame = load_image_from_path(frame_path)
-            processed_frame = perform_background_removal(frame)
-            save_processed_image_png(processed_frame, output_path)
-            
-        # Combine processed frames into video
-        logger.info("🎬 Step 4/5: Combining processed frames...")
-        output_video = os.path.join(temp_dir, "output.mov")
-        if not combine_frames_to_video(temp_processed_dir, output_video):
-            logger.error("❌ Failed to combine frames")
-            cleanup_temp_files(temp_dir, fps_video_path)
-            raise HTTPException(status_code=400, detail="Failed to combine frames")
-            
-        # Add audio to final video
-        logger.info("🔊 Step 5/5: Adding audio...")
+        # Stream frames through background removal straight into the encoder
+        logger.info("🎯 Processing and encoding frames...")
+        width, height = await asyncio.to_thread(get_video_dimensions, request.video_path)
+        width, height = fit_to_height(width, height, RMBG_MAX_HEIGHT)
         final_video_name = generate_video_filename(request.video_path, "bg_removed")
         final_video_path = f"assets/public/{final_video_name}"
-        if not add_audio_to_video(output_video, audio_path, final_video_path):
-            logger.error("❌ Failed to add audio")
-            cleanup_temp_files(temp_dir, fps_video_path)
-            raise HTTPException(status_code=400, detail="Failed to add audio")
+        def process_range(first_frame: int, end_frame: Optional[int]) -> Iterator[np.ndarray]:
+            return map_frame_batches(
+                lambda batch: perform_background_removal_batch(batch, RMBG_BATCH_SIZE),
+                iter_frame_batches(request.video_path, width, height, RMBG_BATCH_SIZE, first_frame, end_frame),
+                GPU_FRAME_WORKERS
+            )
+        
+        encoded = await asyncio.to_thread(
+            encode_video_in_groups, request.video_path, process_range, width, height, "rgba",
+            final_video_path, GPU_FRAME_GROUPS
+        )
+        if not encoded:
+            logger.error("❌ Failed to encode processed frames")
+            raise HTTPException(status_code=400, detail="Failed to encode processed frames")
             
-        # Clean up temporary files
-        cleanup_temp_files(temp_dir, fps_video_path)
-        
         # Return response
         absolute_path = get_absolute_path(final_video_path)
         download_link = f"/api/assets/public/{final_video_name}"
@@ -283,8 +547,6 @@ async def api_video_background_removal(request: VideoRequest) -> VideoResponse:
         )
         
     except Exception as e:
-        # Ensure cleanup on any exception
-        cleanup_temp_files(temp_dir, fps_video_path)
         logger.error(f"💥 Unexpected error in background removal API: {e}")
         raise HTTPException(status_code=500, detail="An unexpected error occurred during background removal.")
 
@@ -306,72 +568,34 @@ async def api_video_color_grading(request: ColorGradingRequest) -> VideoResponse
     Raises:
         HTTPException: If processing fails
     """
-    temp_dir = None
-    fps_video_path = None
     try:
         # Validate paths
         validate_video_path(request.video_path)
         validate_image_path(request.reference_image_path)
         
-        # Step 1: Convert video to 24 FPS
-        logger.info("🔄 Step 1/5: Converting video to 24 FPS...")
-        fps_video_name = generate_unique_filename("mp4")
-        fps_video_path = os.path.join(tempfile.gettempdir(), fps_video_name)
-        if not convert_video_to_24fps(request.video_path, fps_video_path):
-            logger.error("❌ Failed to convert video to 24 FPS")
-            raise HTTPException(status_code=500, detail="Failed to convert video to 24 FPS")
-        logger.info("✅ Video conversion to 24 FPS completed successfully")
-
-        # Create temporary files
-        temp_dir = create_temp_directory()
-        temp_frames_dir = os.path.join(temp_dir, "frames")
-        temp_processed_dir = os.path.join(temp_dir, "processed")
-        os.makedirs(temp_frames_dir)
-        os.makedirs(temp_processed_dir)
-        
-        # Extract frames and audio
-        logger.info("🔄 Step 2/5: Extracting video frames and audio...")
-        audio_path = os.path.join(temp_dir, "audio.aac")
-        if not extract_frames_and_audio(fps_video_path, temp_frames_dir, audio_path):
-            logger.error("❌ Failed to extract frames and audio")
-            cleanup_temp_files(temp_dir, fps_video_path)
-            raise HTTPException(status_code=400, detail="Failed to extract video frames")
-            
-        # Load reference image for color transfer
-        reference_image = load_image_from_path(request.reference_image_path)
+        # Reference statistics are computed once, not per frame batch
+        reference_stats = compute_color_stats(load_image_from_path(request.reference_image_path))
             
-        # Process each frame
-        logger.info("🎯 Step 3/5: Processing frames...")
-        frame_files = sorted(os.listdir(temp_frames_dir))
-        for frame_file in frame_files:
-            frame_path = os.path.join(temp_frames_dir, frame_file)
-            output_path = os.path.join(temp_processed_dir, frame_file)
-            
-            # Load frame and apply color transfer
-            frame = load_image_from_path(frame_path)
-            processed_frame = perform_color_transfer(frame, reference_image)
-            save_processed_image(processed_frame, output_path)
-            
-        # Combine processed frames into video
-        logger.info("🎬 Step 4/5: Combining processed frames...")
-        output_video = os.path.join(temp_dir, "output.mov")
-        if not combine_frames_to_video(temp_processed_dir, output_video):
-            logger.error("❌ Failed to combine frames")
-            cleanup_temp_files(temp_dir, fps_video_path)
-            raise HTTPException(status_code=400, detail="Failed to combine frames")
-            
-        # Add audio to final video
-        logger.info("🔊 Step 5/5: Adding audio...")
+        # Stream frames through color transfer straight into the encoder
+        logger.info("🎯 Processing and encoding frames...")
+        width, height = await asyncio.to_thread(get_video_dimensions, request.video_path)
         final_video_name = generate_video_filename(request.video_path, "color_graded")
         final_video_path = f"assets/public/{final_video_name}"
-        if not add_audio_to_video(output_video, audio_path, final_video_path):
-            logger.error("❌ Failed to add audio")
-            cleanup_temp_files(temp_dir, fps_video_path)
-            raise HTTPException(status_code=400, detail="Failed to add audio")
+        def process_range(first_frame: int, end_frame: Optional[int]) -> Iterator[np.ndarray]:
+            return map_frame_batches(
+                lambda batch: perform_color_transfer_batch(reference_stats, batch),
+                iter_frame_batches(request.video_path, width, height, COLOR_TRANSFER_BATCH_SIZE, first_frame, end_frame),
+                COLOR_TRANSFER_WORKERS
+            )
+        
+        encoded = await asyncio.to_thread(
+            encode_video_in_groups, request.video_path, process_range, width, height, "rgb24",
+            final_video_path, CPU_FRAME_GROUPS
+        )
+        if not encoded:
+            logger.error("❌ Failed to encode processed frames")
+            raise HTTPException(status_code=400, detail="Failed to encode processed frames")
             
-        # Clean up temporary files
-        cleanup_temp_files(temp_dir, fps_video_path)
-        
         # Return response
         absolute_path = get_absolute_path(final_video_path)
         download_link = f"/api/assets/public/{final_video_name}"
@@ -382,8 +606,6 @@ async def api_video_color_grading(request: ColorGradingRequest) -> VideoResponse
         )
         
     except Exception as e:
-        # Ensure cleanup on any exception
-        cleanup_temp_files(temp_dir, fps_video_path)
         logger.error(f"💥 Unexpected error in color grading API: {e}")
         raise HTTPException(status_code=500, detail="An unexpected error occurred during color grading.")
 
@@ -405,68 +627,29 @@ async def api_video_portrait_effect(request: VideoRequest) -> VideoResponse:
     Raises:
         HTTPException: If processing fails
     """
-    temp_dir = None
-    fps_video_path = None
     try:
         # Validate video path
         validate_video_path(request.video_path)
         
-        # Step 1: Convert video to 24 FPS
-        logger.info("🔄 Step 1/5: Converting video to 24 FPS...")
-        fps_video_name = generate_unique_filename("mp4")
-        fps_video_path = os.path.join(tempfile.gettempdir(), fps_video_name)
-        if not convert_video_to_24fps(request.video_path, fps_video_path):
-            logger.error("❌ Failed to convert video to 24 FPS")
-            raise HTTPException(status_code=500, detail="Failed to convert video to 24 FPS")
-        logger.info("✅ Video conversion to 24 FPS completed successfully")
-
-        # Create temporary directory
-        temp_dir = create_temp_directory()
-        temp_frames_dir = os.path.join(temp_dir, "frames")
-        temp_processed_dir = os.path.join(temp_dir, "processed")
-        os.makedirs(temp_frames_dir)
-        os.makedirs(temp_processed_dir)
-        
-        # Extract frames and audio
-        logger.info("🔄 Step 2/5: Extracting frames and audio...")
-        audio_path = os.path.join(temp_dir, "audio.aac")
-        if not extract_frames_and_audio(fps_video_path, temp_frames_dir, audio_path):
-            logger.error("❌ Failed to extract video frames")
-            cleanup_temp_files(temp_dir, fps_video_path)
-            raise HTTPException(status_code=400, detail="Failed to extract video frames")
-            
-        # Process each frame
-        logger.info("🎯 Step 3/5: Processing frames...")
-        frame_files = sorted(os.listdir(temp_frames_dir))
-        for frame_file in frame_files:
-            frame_path = os.path.join(temp_frames_dir, frame_file)
-            output_path = os.path.join(temp_processed_dir, frame_file)
-            
-            # Load frame and apply portrait effect
-            frame = load_image_from_path(frame_path)
-            processed_frame = create_portrait_effect(frame)
-            save_processed_image(processed_frame, output_path)
-            
-        # Combine processed frames into video
-        logger.info("🎬 Step 4/5: Combining processed frames...")
-        output_video = os.path.join(temp_dir, "output.mov")
-        if not combine_frames_to_video(temp_processed_dir, output_video):
-            logger.error("❌ Failed to combine frames")
-            cleanup_temp_files(temp_dir, fps_video_path)
-            raise HTTPException(status_code=400, detail="Failed to combine frames")
-            
-        # Add audio to final video
-        logger.info("🔊 Step 5/5: Adding audio...")
+        # Stream frames through the portrait effect straight into the encoder
+        logger.info("🎯 Processing and encoding frames...")
+        width, height = await asyncio.to_thread(get_video_dimensions, request.video_path)
         final_video_name = generate_video_filename(request.video_path, "portrait")
         final_video_path = f"assets/public/{final_video_name}"
-        if not add_audio_to_video(output_video, audio_path, final_video_path):
-            logger.error("❌ Failed to add audio")
-            cleanup_temp_files(temp_dir, fps_video_path)
-            raise HTTPException(status_code=400, detail="Failed to add audio")
+        def process_range(first_frame: int, end_frame: Optional[int]) -> Iterator[np.ndarray]:
+            return map_frames_in_order(
+                create_portrait_effect, iter_frames(request.video_path, width, height, first_frame, end_frame),
+                GPU_FRAME_WORKERS
+            )
+        
+        encoded = await asyncio.to_thread(
+            encode_video_in_groups, request.video_path, process_range, width, height, "rgb24",
+            final_video_path, GPU_FRAME_GROUPS
+        )
+        if not encoded:
+            logger.error("❌ Failed to encode processed frames")
+            raise HTTPException(status_code=400, detail="Failed to encode processed frames")
             
-        # Clean up temporary directory
-        cleanup_temp_files(temp_dir, fps_video_path)
-        
         # Return response
         absolute_path = get_absolute_path(final_video_path)
         download_link = f"/api/assets/public/{final_video_name}"
@@ -478,10 +661,9 @@ async def api_video_portrait_effect(request: VideoRequest) -> VideoResponse:
         
     except Exception as e:
         logger.error(f"💥 Unexpected error: {str(e)}")
-        if temp_dir:
-            cleanup_temp_files(temp_dir)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+
 @router.post("/api/video/denoise")
 async def api_video_denoise(request: VideoRequest):
     """
@@ -505,21 +687,16 @@ async def api_video_denoise(request: VideoRequest):
         # Extract audio
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_audio = Path(temp_dir) / "temp_audio.wav"
-            subprocess.run([
-                'ffmpeg', '-i', abs_input_path, '-vn', '-acodec', 'pcm_s16le',
-                '-ar', '44100', '-ac', '2', str(temp_audio), '-y'
-            ], capture_output=True, check=True)
+            await run_ffmpeg_async('-i', abs_input_path, *_DENOISE_EXTRACT_ARGS, str(temp_audio), '-y')
             
             # Process audio with noise reduction
             from audio_utils import remove_noise
-            processed_audio = remove_noise(str(temp_audio))
+            processed_audio = await asyncio.to_thread(remove_noise, str(temp_audio))
             
             # Combine processed audio with original video
-            subprocess.run([
-                'ffmpeg', '-i', abs_input_path, '-i', processed_audio,
-                '-c:v', 'copy', '-map', '0:v:0', '-map', '1:a:0',
-                '-shortest', abs_output_path, '-y'
-            ], capture_output=True, check=True)
+            await run_ffmpeg_async(
+                '-i', abs_input_path, '-i', processed_audio, *_DENOISE_MUX_ARGS, abs_output_path, '-y'
+            )
         
         return {
             "success": True,
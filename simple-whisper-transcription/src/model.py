@@ -2,11 +2,42 @@
 # Copyright (c) 2024 Qualcomm Innovation Center, Inc. All rights reserved.
 # SPDX-License-Identifier: BSD-3-Clause
 # ---------------------------------------------------------------------
+import os
+import threading
+
 import numpy as np
 import onnxruntime
 from qai_hub_models.models._shared.whisper.model import Whisper
 
 
+def get_onnxruntime_session(path, execution_provider="qnn"):
+    if execution_provider == "cpu":
+        return get_onnxruntime_session_with_cpu_ep(path)
+    return get_onnxruntime_session_with_qnn_ep(path)
+
+
+# CPU session for the INT8 models from quantize_whisper.py, which the QNN HTP backend can't run
+def get_onnxruntime_session_with_cpu_ep(path):
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # Reuse the arena and the memory plan from the first run instead of allocating per inference
+    options.enable_cpu_mem_arena = True
+    options.enable_mem_pattern = True
+    # Defaults to the physical cores (hyperthreads add little to bandwidth-bound int8 GEMMs)
+    # divided between the server's worker processes; WHISPER_INTRA_OP_THREADS overrides it
+    # when other sessions or servers share the machine
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    options.intra_op_num_threads = int(
+        os.environ.get("WHISPER_INTRA_OP_THREADS", max(1, (os.cpu_count() or 2) // 2 // workers))
+    )
+    # The graphs are sequential, so parallel branches gain nothing
+    options.inter_op_num_threads = 1
+    options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    return onnxruntime.InferenceSession(
+        path, sess_options=options, providers=["CPUExecutionProvider"]
+    )
+
+
 def get_onnxruntime_session_with_qnn_ep(path):
     options = onnxruntime.SessionOptions()
     session = onnxruntime.InferenceSession(
@@ -27,19 +58,43 @@ def get_onnxruntime_session_with_qnn_ep(path):
 
 
 class ONNXEncoderWrapper:
-    def __init__(self, encoder_path):
-        self.session = get_onnxruntime_session_with_qnn_ep(encoder_path)
+    def __init__(self, encoder_path, execution_provider="qnn"):
+        self.session = get_onnxruntime_session(encoder_path, execution_provider)
+        # The encoder always sees the same padded 30 s mel shape, so each thread binds
+        # one input buffer and its outputs once and reuses them for every request
+        self._bindings = threading.local()
 
     def to(self, *args):
         return self
 
+    def _bind(self, audio):
+        local = self._bindings
+        local.binding = self.session.io_binding()
+        local.input_value = onnxruntime.OrtValue.ortvalue_from_shape_and_type(
+            audio.shape, audio.dtype.type, "cpu"
+        )
+        local.binding.bind_ortvalue_input("audio", local.input_value)
+        for output in self.session.get_outputs():
+            local.binding.bind_output(output.name, "cpu")
+        local.outputs_bound = False
+
     def __call__(self, audio):
-        return self.session.run(None, {"audio": audio})
+        local = self._bindings
+        if getattr(local, "input_value", None) is None or local.input_value.shape() != list(audio.shape):
+            self._bind(audio)
+        local.input_value.update_inplace(np.ascontiguousarray(audio))
+        self.session.run_with_iobinding(local.binding)
+        if not local.outputs_bound:
+            # Keep the output buffers ORT allocated on the first run for all later runs
+            for output, value in zip(self.session.get_outputs(), local.binding.get_outputs()):
+                local.binding.bind_ortvalue_output(output.name, value)
+            local.outputs_bound = True
+        return local.binding.copy_outputs_to_cpu()
 
 
 class ONNXDecoderWrapper:
-    def __init__(self, decoder_path):
-        self.session = get_onnxruntime_session_with_qnn_ep(decoder_path)
+    def __init__(self, decoder_path, execution_provider="qnn"):
+        self.session = get_onnxruntime_session(decoder_path, execution_provider)
 
     def to(self, *args):
         return self
@@ -61,10 +116,10 @@ class ONNXDecoderWrapper:
 
 
 class WhisperBaseEnONNX(Whisper):
-    def __init__(self, encoder_path, decoder_path):
+    def __init__(self, encoder_path, decoder_path, execution_provider="qnn"):
         return super().__init__(
-            ONNXEncoderWrapper(encoder_path),
-            ONNXDecoderWrapper(decoder_path),
+            ONNXEncoderWrapper(encoder_path, execution_provider),
+            ONNXDecoderWrapper(decoder_path, execution_provider),
             num_decoder_blocks=6,
             num_heads=8,
             attention_dim=512,
@@ -1,4 +1,11 @@
+import asyncio
 import fastapi
+import functools
+import hashlib
+import logging
+import logging.handlers
+import queue
+import re
 import numpy as np
 import os
 import sys
@@ -6,15 +13,47 @@ import time
 import uvicorn
 import yaml
 import ffmpeg
-import base64
+import io
 import tempfile
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+# pybase64 is a drop-in for the stdlib module with a SIMD decoder, which matters
+# for multi-MB audio payloads; fall back to the stdlib if it isn't installed
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+# PyAV decodes in-process, avoiding an ffmpeg subprocess and pipe copy per request;
+# the ffmpeg CLI is used when it isn't installed
+try:
+    import av
+except ImportError:
+    av = None
+
+from collections import OrderedDict
+from typing import BinaryIO
+
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 
 from model import WhisperBaseEnONNX
 from qai_hub_models.models.whisper_base_en import App as WhisperApp
 
+# ------------------------------------------------------------------
+# Logging
+# ------------------------------------------------------------------
+
+# Handlers only enqueue records; a background listener thread does the stderr
+# writes, so request handlers never block on console IO. LOG_LEVEL=DEBUG adds
+# per-request progress messages.
+_LOG_QUEUE = queue.SimpleQueue()
+_LOG_LISTENER = logging.handlers.QueueListener(_LOG_QUEUE, logging.StreamHandler())
+logger = logging.getLogger("whisper_server")
+logger.addHandler(logging.handlers.QueueHandler(_LOG_QUEUE))
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+logger.propagate = False
+
 # ------------------------------------------------------------------
 # Globals
 # ------------------------------------------------------------------
@@ -25,8 +64,20 @@ MODEL: WhisperApp | None = None
 CONFIG: dict = {}
 # Sample rate the model expects
 SAMPLE_RATE = 16000
+# Peak amplitude (float PCM, 1.0 = full scale) below which audio is treated as silence
+# and not sent to the model; 0 disables the check
+SILENCE_THRESHOLD = 0.001
+# Most recent transcripts keyed by a hash of the decoded PCM, so retried or
+# re-encoded copies of the same recording skip inference. Only touched from the
+# event loop thread, so it needs no lock.
+TRANSCRIPT_CACHE_SIZE = 256
+TRANSCRIPT_CACHE: OrderedDict[bytes, str] = OrderedDict()
+# Limits concurrent transcriptions to "max_workers" so threads don't oversubscribe the backend
+TRANSCRIBE_SLOTS: asyncio.Semaphore | None = None
 
 app = FastAPI()
+# Long transcripts compress well; short responses aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 # ------------------------------------------------------------------
 # Pydantic Models for OpenAI compatibility
@@ -41,19 +92,105 @@ class AudioDataRequest(BaseModel):
 class ClientTranscriptionResponse(BaseModel):
     data: str
 
+# ------------------------------------------------------------------
+# Audio decoding
+# ------------------------------------------------------------------
+
+_BASE64_WHITESPACE = frozenset(b" \t\r\n\v\f")
+# "data:<mime>[;params]," header of a data URL, matched in C on the encoded bytes
+_DATA_URI_RE = re.compile(rb"data:[^;,]*(?:;[^,]*)?,")
+# Padding to append for each remainder of len(payload) % 4
+_BASE64_PADDING = (b"", b"===", b"==", b"=")
+
+def decode_base64_payload(audio_data: str) -> bytes:
+    """
+    Decode base64 audio, optionally wrapped in a data: URL and missing its padding.
+
+    The string is encoded to ASCII once; the data: prefix and surrounding whitespace
+    are then trimmed through a memoryview, so the multi-MB payload is only copied
+    again when padding has to be appended.
+    """
+    payload = audio_data.encode("ascii")
+    header = _DATA_URI_RE.match(payload)
+    start, end = (header.end() if header else 0), len(payload)
+    while start < end and payload[start] in _BASE64_WHITESPACE:
+        start += 1
+    while end > start and payload[end - 1] in _BASE64_WHITESPACE:
+        end -= 1
+    view = memoryview(payload)[start:end]
+
+    padding = _BASE64_PADDING[len(view) & 3]
+    if padding:
+        return base64.b64decode(bytes(view) + padding)
+    return base64.b64decode(view)
+
+class AudioDecodeError(Exception):
+    """Raised when the uploaded audio can't be decoded."""
+
+def _decode_with_av(audio: bytes | BinaryIO) -> np.ndarray:
+    # libswresample emits mono float32 at the model rate, so no s16 -> float pass is needed
+    resampler = av.AudioResampler(format="flt", layout="mono", rate=SAMPLE_RATE)
+    chunks = []
+    # File objects (e.g. an upload's spooled temp file) are demuxed as they are read
+    source = io.BytesIO(audio) if isinstance(audio, bytes) else audio
+    with av.open(source) as container:
+        for frame in container.decode(audio=0):
+            chunks.extend(out.to_ndarray()[0] for out in resampler.resample(frame))
+        # Flush samples still buffered in the resampler
+        chunks.extend(out.to_ndarray()[0] for out in resampler.resample(None))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+def _decode_with_ffmpeg(audio_bytes: bytes) -> np.ndarray:
+    out, _ = (
+        ffmpeg
+        .input("pipe:0")
+        .output("pipe:1", format="f32le", ac=1, ar=SAMPLE_RATE)
+        .run(input=audio_bytes, capture_stdout=True, capture_stderr=True)
+    )
+    return np.frombuffer(out, np.float32)
+
+def decode_to_float32(audio: bytes | BinaryIO) -> np.ndarray:
+    """
+    Decode an audio file to mono float32 PCM at SAMPLE_RATE.
+
+    Args:
+        audio: Encoded audio as bytes or a readable binary file object
+
+    Raises:
+        AudioDecodeError: If the audio can't be decoded
+    """
+    if av is not None:
+        try:
+            return _decode_with_av(audio)
+        except (av.error.FFmpegError, IndexError, ValueError) as e:
+            raise AudioDecodeError(str(e))
+    try:
+        return _decode_with_ffmpeg(audio if isinstance(audio, bytes) else audio.read())
+    except ffmpeg.Error as e:
+        raise AudioDecodeError(e.stderr.decode())
+
 # ------------------------------------------------------------------
 # Lifespan events
 # ------------------------------------------------------------------
 
+# libyaml's C loader when PyYAML was built with it, the pure-Python one otherwise
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+@functools.lru_cache(maxsize=1)
+def load_config() -> dict:
+    """Parse config.yaml once per process; later calls return the cached dict."""
+    with open("config.yaml", "r") as f:
+        return yaml.load(f, Loader=_YAML_LOADER) or {}
+
 @app.on_event("startup")
 def load_on_startup():
     """Load the model and config when the server starts."""
-    global MODEL, CONFIG, SAMPLE_RATE
+    global MODEL, CONFIG, SAMPLE_RATE, SILENCE_THRESHOLD, TRANSCRIBE_SLOTS
+    _LOG_LISTENER.start()
 
     # Load config from YAML
     try:
-        with open("config.yaml", "r") as f:
-            CONFIG = yaml.safe_load(f)
+        CONFIG = load_config()
     except FileNotFoundError:
         sys.exit("Could not find config.yaml. Please create it based on the README.")
 
@@ -61,73 +198,129 @@ def load_on_startup():
     encoder_path = CONFIG.get("encoder_path", "models/WhisperEncoder.onnx")
     decoder_path = CONFIG.get("decoder_path", "models/WhisperDecoder.onnx")
     SAMPLE_RATE = CONFIG.get("sample_rate", 16000)
+    # "qnn" (Snapdragon NPU) or "cpu" (e.g. for INT8 models from quantize_whisper.py)
+    execution_provider = CONFIG.get("execution_provider", "qnn")
+    SILENCE_THRESHOLD = CONFIG.get("silence_threshold", SILENCE_THRESHOLD)
+    TRANSCRIBE_SLOTS = asyncio.Semaphore(CONFIG.get("max_workers", 1))
 
     # Check that model files exist
     if not os.path.exists(encoder_path) or not os.path.exists(decoder_path):
         sys.exit(f"Model files not found. Searched for encoder at '{encoder_path}' and decoder at '{decoder_path}'. Please follow README to download models.")
     
     # Load the Whisper model
-    print("Loading Whisper model...")
-    MODEL = WhisperApp(WhisperBaseEnONNX(encoder_path, decoder_path))
-    print("Model loaded successfully.")
+    logger.info("Loading Whisper model...")
+    MODEL = WhisperApp(WhisperBaseEnONNX(encoder_path, decoder_path, execution_provider))
+    logger.info("Model loaded successfully.")
+
+    # Run one silent clip through the encoder and decoder so graph finalization
+    # happens now rather than on the first user request
+    logger.info("Warming up model...")
+    try:
+        MODEL.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), SAMPLE_RATE)
+        logger.info("Model warmed up.")
+    except Exception as e:
+        logger.warning("Model warm-up failed, first request will be slower: %s", e)
+
+@app.on_event("shutdown")
+def stop_logging():
+    """Flush queued log records before the process exits."""
+    _LOG_LISTENER.stop()
 
 # ------------------------------------------------------------------
 # API Endpoints
 # ------------------------------------------------------------------
 
+def is_silent(audio_np: np.ndarray) -> bool:
+    """Return True for empty audio or audio whose peak stays below SILENCE_THRESHOLD."""
+    if audio_np.size == 0:
+        return True
+    # max/min avoid allocating an np.abs copy of the whole clip
+    peak = max(float(audio_np.max()), -float(audio_np.min()))
+    return peak < SILENCE_THRESHOLD
+
+def audio_cache_key(audio_np: np.ndarray) -> bytes:
+    """Hash decoded PCM for TRANSCRIPT_CACHE."""
+    return hashlib.blake2b(np.ascontiguousarray(audio_np), digest_size=16).digest()
+
+async def transcribe_in_thread(audio_np: np.ndarray) -> str:
+    """
+    Run the blocking Whisper inference on a worker thread so the event loop keeps serving requests.
+
+    Silent audio returns an empty transcript without running the model, and audio
+    transcribed recently is answered from TRANSCRIPT_CACHE.
+    """
+    if is_silent(audio_np):
+        logger.debug("Audio is silent, skipping transcription")
+        return ""
+
+    key = await asyncio.to_thread(audio_cache_key, audio_np)
+    cached = TRANSCRIPT_CACHE.get(key)
+    if cached is not None:
+        TRANSCRIPT_CACHE.move_to_end(key)
+        logger.debug("Returning cached transcript")
+        return cached
+
+    async with TRANSCRIBE_SLOTS:
+        transcript = await asyncio.to_thread(MODEL.transcribe, audio_np, SAMPLE_RATE)
+    TRANSCRIPT_CACHE[key] = transcript
+    if len(TRANSCRIPT_CACHE) > TRANSCRIPT_CACHE_SIZE:
+        TRANSCRIPT_CACHE.popitem(last=False)
+    return transcript
+
+async def transcribe_client_audio(audio_bytes: bytes) -> str:
+    """Decode and transcribe an audio file sent by the client app."""
+    try:
+        # Decode to 16kHz mono float32 PCM
+        audio_np = await asyncio.to_thread(decode_to_float32, audio_bytes)
+    except AudioDecodeError as e:
+        logger.error("FFmpeg error occurred: %s", e)
+        raise HTTPException(status_code=500, detail=f"FFmpeg conversion failed: {e}")
+
+    # Transcribe the audio
+    logger.debug("Transcribing audio...")
+    start_time = time.time()
+    transcript = await transcribe_in_thread(audio_np)
+    end_time = time.time()
+    
+    logger.info("Transcription complete in %.2fs: \"%s\"", end_time - start_time, transcript)
+    return transcript
+
 @app.post("/api/transcribe", response_model=ClientTranscriptionResponse)
 async def transcribeAudio(request: AudioDataRequest):
     """
-    Endpoint to handle audio transcription requests from the client.
+    Endpoint to handle base64 audio transcription requests from the client.
+
+    Deprecated: kept for older clients; new clients post the audio to /api/transcribe_raw.
     """
-    print("Received audio data for transcription")
+    logger.debug("Received audio data for transcription")
     
     # Clean and validate base64 audio data
-    print("Cleaning and decoding base64 audio data...")
-    audio_data = request.audioData
-    
-    if audio_data.startswith('data:'):
-        audio_data = audio_data.split(',', 1)[1]
-    
-    audio_data = audio_data.strip()
-    
-    missing_padding = len(audio_data) % 4
-    if missing_padding:
-        audio_data += '=' * (4 - missing_padding)
-    
+    logger.debug("Cleaning and decoding base64 audio data...")
     try:
-        audio_bytes = base64.b64decode(audio_data)
+        audio_bytes = await asyncio.to_thread(decode_base64_payload, request.audioData)
     except Exception as decode_error:
-        print(f"Base64 decode error: {decode_error}")
+        logger.error("Base64 decode error: %s", decode_error)
         raise HTTPException(status_code=400, detail=f"Invalid base64 audio data: {str(decode_error)}")
     
     if not audio_bytes:
         raise HTTPException(status_code=400, detail="No audio data received after decoding")
 
-    try:
-        # Use ffmpeg to convert the audio to 16kHz mono PCM s16le format
-        out, _ = (
-            ffmpeg
-            .input("pipe:0")
-            .output("pipe:1", format="s16le", ac=1, ar=SAMPLE_RATE)
-            .run(input=audio_bytes, capture_stdout=True, capture_stderr=True)
-        )
-    except ffmpeg.Error as e:
-        print(f"FFmpeg error occurred: {e.stderr.decode()}")
-        raise HTTPException(status_code=500, detail=f"FFmpeg conversion failed: {e.stderr.decode()}")
+    return {"data": await transcribe_client_audio(audio_bytes)}
 
-    # Convert the raw PCM data to a float32 numpy array
-    audio_np = np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+@app.post("/api/transcribe_raw", response_model=ClientTranscriptionResponse)
+async def transcribeAudioRaw(request: Request):
+    """
+    Endpoint for clients that send the recorded audio file itself as the request body.
 
-    # Transcribe the audio
-    print("Transcribing audio...")
-    start_time = time.time()
-    transcript = MODEL.transcribe(audio_np, SAMPLE_RATE)
-    end_time = time.time()
-    
-    print(f"Transcription complete in {end_time - start_time:.2f}s: \"{transcript}\"")
+    Skips the base64 round trip of /api/transcribe (a third more bytes on the wire
+    plus an encode and a decode pass).
+    """
+    logger.debug("Received raw audio data for transcription")
+    audio_bytes = await request.body()
+    if not audio_bytes:
+        raise HTTPException(status_code=400, detail="No audio data received")
 
-    return {"data": transcript}
+    return {"data": await transcribe_client_audio(audio_bytes)}
 
 @app.post("/v1/audio/transcriptions", response_model=TranscriptionResponse)
 async def create_transcription(
@@ -140,29 +333,19 @@ async def create_transcription(
     if MODEL is None:
         raise HTTPException(status_code=503, detail="Model is not loaded yet. Please wait a moment and try again.")
     
-    # Read the uploaded file into memory
-    audio_bytes = await file.read()
-
-    # Use ffmpeg to convert the audio to 16kHz mono PCM s16le format
+    # Decode to 16kHz mono float32 PCM straight from the upload's spooled file,
+    # without first reading the whole upload into one bytes object
     try:
-        out, _ = (
-            ffmpeg
-            .input("pipe:0")
-            .output("pipe:1", format="s16le", ac=1, ar=SAMPLE_RATE)
-            .run(input=audio_bytes, capture_stdout=True, capture_stderr=True)
-        )
-    except ffmpeg.Error as e:
-        raise HTTPException(status_code=500, detail=f"FFmpeg error: {e.stderr.decode()}")
-    
-    # Convert the raw PCM data to a float32 numpy array
-    audio_np = np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+        audio_np = await asyncio.to_thread(decode_to_float32, file.file)
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=500, detail=f"FFmpeg error: {e}")
 
     # Transcribe the audio
     start_time = time.time()
-    transcript = MODEL.transcribe(audio_np, SAMPLE_RATE)
+    transcript = await transcribe_in_thread(audio_np)
     end_time = time.time()
     
-    print(f"Transcription complete in {end_time - start_time:.2f}s: \"{transcript}\"")
+    logger.info("Transcription complete in %.2fs: \"%s\"", end_time - start_time, transcript)
 
     return {"text": transcript}
 
@@ -171,4 +354,12 @@ async def create_transcription(
 # ------------------------------------------------------------------
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
+    # Each worker process loads its own model sessions; the CPU sessions split the
+    # cores between workers (see model.py)
+    workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    # "auto" picks uvloop and httptools (installed with uvicorn[standard]) where they
+    # are available; uvloop has no Windows build, so they are not forced
+    uvicorn.run(
+        "openai_server:app" if workers > 1 else app,
+        host="0.0.0.0", port=8001, loop="auto", http="auto", workers=workers
+    )
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Quantize the Whisper encoder/decoder weights to INT8 for CPU inference.
+
+Dynamic quantization stores weights as int8 and quantizes activations on the fly,
+cutting weight bytes 4x for the bandwidth-bound matmuls. The resulting models use
+integer ops the QNN HTP backend doesn't run, so serve them with
+`"execution_provider": "cpu"` in config.yaml.
+
+Usage: python src/quantize_whisper.py [models_dir]
+"""
+import os
+import sys
+
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+MODEL_NAMES = ("WhisperEncoder", "WhisperDecoder")
+
+
+def main():
+    models_dir = sys.argv[1] if len(sys.argv) > 1 else "models"
+    for name in MODEL_NAMES:
+        source = os.path.join(models_dir, f"{name}.onnx")
+        target = os.path.join(models_dir, f"{name}.int8.onnx")
+        print(f"Quantizing {source} -> {target}...")
+        quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+    print("Done. Point encoder_path/decoder_path at the .int8.onnx files and set execution_provider to cpu.")
+
+
+if __name__ == "__main__":
+    main()